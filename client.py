@@ -32,6 +32,8 @@ Available commands:
 /whisper <username> <message>
                     - Send a private message to a specific user
 /users              - Request a list of online users from the server
+/search <terms> [--user X] [--since T]
+                    - Search message history (T is e.g. 30m, 2h, 1d)
 /clear              - Clear the screen
 quit                - Exit the chat
 
@@ -0,0 +1,256 @@
+import re
+import time
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+
+'''
+history_index.py - An in-memory search index over chat messages.
+
+Messages are kept in a fixed-size ring buffer. Each message gets an increasing id,
+and the index keeps, for every word and every username, a sorted array of the ids
+that contain it plus a head offset. When the index is full the oldest message is
+evicted; it has the smallest id, so eviction just advances the head of each of its
+posting lists. Arrays are compacted into a new array once mostly dead, never in place.
+
+The index is bounded both by message count and by an estimate of its size in bytes,
+so a flood of unique words can't grow it past max_bytes. The ring buffer's slots are
+allocated up front and count against max_bytes from the start.
+
+Searches only hold the lock long enough to note the current bounds of the posting
+lists they need. Because arrays are only appended to or replaced, the scan can then
+run without the lock while messages keep being added. The scan intersects the lists
+newest first by leapfrogging: each list is binary searched for the current candidate
+and the candidate skips straight to the largest id all lists might share. A step
+budget caps the work per query; when it runs out the results found so far are
+returned with truncated set.
+'''
+
+WORD_PATTERN = re.compile(r"\w+")
+
+DURATION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+# Rough per-item costs used for the max_bytes bound
+RECORD_OVERHEAD = 120
+POSTING_OVERHEAD = 150
+ID_SIZE = 8
+SLOT_SIZE = 8
+
+
+def tokenize(text):
+    return WORD_PATTERN.findall(text.lower())
+
+
+def parse_since(value, now=None):
+    '''
+    Turn a --since value into a unix timestamp. Accepts a duration ago
+    ("30s", "15m", "2h", "1d") or an absolute unix timestamp.
+    '''
+    now = time.time() if now is None else now
+    value = value.strip().lower()
+    try:
+        if value and value[-1] in DURATION_UNITS:
+            return now - float(value[:-1]) * DURATION_UNITS[value[-1]]
+        return float(value)
+    except ValueError:
+        raise ValueError(f"Invalid --since value: {value}")
+
+
+def parse_search_args(args):
+    '''
+    Split /search arguments into (terms, user, since).
+    Raises ValueError for a missing option value or a bad --since.
+    '''
+    terms = []
+    user = None
+    since = None
+    i = 0
+    while i < len(args):
+        arg = args[i]
+        if arg in ('--user', '--since'):
+            if i + 1 >= len(args):
+                raise ValueError(f"Missing value for {arg}")
+            if arg == '--user':
+                user = args[i + 1]
+            else:
+                since = parse_since(args[i + 1])
+            i += 2
+        else:
+            terms.append(arg)
+            i += 1
+    return terms, user, since
+
+
+class SearchResults(list):
+    '''A list of (timestamp, username, message) tuples; truncated is True if the scan budget ran out.'''
+
+    def __init__(self, results=(), truncated=False):
+        super().__init__(results)
+        self.truncated = truncated
+
+
+class HistoryIndex:
+    def __init__(self, capacity=100000, max_bytes=64 * 1024 * 1024, max_steps=20000):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        if SLOT_SIZE * capacity >= max_bytes:
+            raise ValueError(f"capacity {capacity} needs more than max_bytes ({max_bytes}) for its slots alone")
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self.max_steps = max_steps
+        self.records = [None] * capacity
+        self.first_id = 0
+        self.next_id = 0
+        self.size_bytes = SLOT_SIZE * capacity
+        # word or lowercased username -> [array of ids, head offset]
+        self.words = {}
+        self.users = {}
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.next_id - self.first_id
+
+    def add(self, username, message, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        words = set(tokenize(message))
+        with self.lock:
+            message_id = self.next_id
+            self.next_id += 1
+            if self.records[message_id % self.capacity] is not None:
+                self.evict()
+            self.records[message_id % self.capacity] = (message_id, timestamp, username, message)
+            self.size_bytes += RECORD_OVERHEAD + len(message) + len(username)
+            for word in words:
+                self.append_posting(self.words, word, message_id)
+            self.append_posting(self.users, username.lower(), message_id)
+            while self.size_bytes > self.max_bytes and self.first_id < message_id:
+                self.evict()
+        return message_id
+
+    def append_posting(self, postings, key, message_id):
+        entry = postings.get(key)
+        if entry is None:
+            postings[key] = [array('q', [message_id]), 0]
+            self.size_bytes += POSTING_OVERHEAD + len(key) + ID_SIZE
+        else:
+            entry[0].append(message_id)
+            self.size_bytes += ID_SIZE
+
+    def evict(self):
+        message_id = self.first_id
+        slot = message_id % self.capacity
+        _, timestamp, username, message = self.records[slot]
+        self.records[slot] = None
+        self.first_id += 1
+        self.size_bytes -= RECORD_OVERHEAD + len(message) + len(username)
+        for word in set(tokenize(message)):
+            self.drop_front(self.words, word, message_id)
+        self.drop_front(self.users, username.lower(), message_id)
+
+    def drop_front(self, postings, key, message_id):
+        entry = postings[key]
+        ids, head = entry
+        if ids[head] != message_id:
+            return
+        head += 1
+        self.size_bytes -= ID_SIZE
+        if head == len(ids):
+            del postings[key]
+            self.size_bytes -= POSTING_OVERHEAD + len(key)
+        elif head > 32 and head * 2 > len(ids):
+            # Searches may still be reading the old array, so replace it rather than shrink it
+            postings[key] = [ids[head:], 0]
+        else:
+            entry[1] = head
+
+    def get(self, message_id):
+        '''Return (timestamp, username, message) for message_id, or None if it has been evicted.'''
+        record = self.records[message_id % self.capacity]
+        if record is None or record[0] != message_id:
+            return None
+        return record[1:]
+
+    def first_id_since(self, since):
+        # Ids are assigned in arrival order, so timestamps are sorted by id
+        low, high = self.first_id, self.next_id
+        while low < high:
+            mid = (low + high) // 2
+            if self.records[mid % self.capacity][1] < since:
+                low = mid + 1
+            else:
+                high = mid
+        return low
+
+    def search(self, terms=(), user=None, since=None, limit=20):
+        '''
+        Return up to `limit` matching messages as SearchResults, newest first.
+        All terms must appear in a message (case-insensitive, whole words).
+        '''
+        words = set()
+        for term in terms:
+            words.update(tokenize(term))
+        keys = [(self.words, word) for word in words]
+        if user is not None:
+            keys.append((self.users, user.lower()))
+
+        with self.lock:
+            min_id = self.first_id if since is None else self.first_id_since(since)
+            max_id = self.next_id
+            lists = []
+            for postings, key in keys:
+                entry = postings.get(key)
+                if entry is None:
+                    return SearchResults()
+                ids, head = entry
+                lists.append((ids, head, len(ids)))
+
+        if not lists:
+            return self.scan_recent(min_id, max_id, limit)
+        return self.intersect(lists, min_id, limit)
+
+    def scan_recent(self, min_id, max_id, limit):
+        results = SearchResults()
+        for message_id in range(max_id - 1, min_id - 1, -1):
+            if len(results) >= limit:
+                break
+            record = self.get(message_id)
+            if record is not None:
+                results.append(record)
+        return results
+
+    def intersect(self, lists, min_id, limit):
+        lists.sort(key=lambda item: item[2] - item[1])
+        arrays = [ids for ids, _, _ in lists]
+        # Only ids >= min_id are wanted, so start each list there
+        lows = [bisect_left(ids, min_id, head, end) for ids, head, end in lists]
+        highs = [end for _, _, end in lists]
+        results = SearchResults()
+        steps = 0
+        while len(results) < limit:
+            if highs[0] <= lows[0]:
+                return results
+            candidate = arrays[0][highs[0] - 1]
+            matched = True
+            for i in range(1, len(arrays)):
+                steps += 1
+                position = bisect_right(arrays[i], candidate, lows[i], highs[i])
+                if position == lows[i]:
+                    return results
+                highs[i] = position
+                largest = arrays[i][position - 1]
+                if largest != candidate:
+                    # Nothing between largest and candidate can be in every list
+                    highs[0] = bisect_right(arrays[0], largest, lows[0], highs[0] - 1)
+                    matched = False
+                    break
+            if matched:
+                record = self.get(candidate)
+                if record is not None:
+                    results.append(record)
+                for i in range(len(arrays)):
+                    highs[i] -= 1
+            steps += 1
+            if steps >= self.max_steps:
+                results.truncated = True
+                return results
+        return results
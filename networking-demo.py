@@ -1,4 +1,14 @@
 import socket
+import sys
+import re
+import json
+import math
+import errno
+import time
+import argparse
+import struct
+import threading
+from urllib.parse import urlsplit
 import requests
 import asyncio
 import aiohttp
@@ -31,16 +41,321 @@ def udp_client():
     
     print("UDP Client Response:", data.decode())
 
+# 2b. TCP/UDP throughput and latency benchmark
+# An iperf-style benchmark built on the same sockets as the TCP and UDP clients above.
+# BenchServer is the bundled server. A TCP connection starts with one mode byte:
+# b'S' (sink) discards everything until EOF, then replies with the byte count it
+# received, so the client times delivery rather than just buffering; b'E' (echo)
+# sends everything straight back. UDP packets are always echoed, so UDP loss,
+# jitter and RTT are measured over the round trip.
+UDP_HEADER = struct.Struct('!Qd')
+UDP_MAX_PAYLOAD = 65507
+LATENCY_CHUNK = 16384
+
+def apply_socket_options(sock, nodelay=False, sndbuf=None, rcvbuf=None):
+    if nodelay and sock.type == socket.SOCK_STREAM:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    if sndbuf:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, sndbuf)
+    if rcvbuf:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, rcvbuf)
+
+def recv_exact(sock, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("Connection closed early")
+        data.extend(chunk)
+    return bytes(data)
+
+class BenchServer:
+    def __init__(self, host='127.0.0.1', port=0, nodelay=False, sndbuf=None, rcvbuf=None):
+        self.options = {"nodelay": nodelay, "sndbuf": sndbuf, "rcvbuf": rcvbuf}
+        self.running = True
+        self.tcp_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.tcp_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        apply_socket_options(self.tcp_socket, sndbuf=sndbuf, rcvbuf=rcvbuf)
+        self.tcp_socket.bind((host, port))
+        self.host, self.port = self.tcp_socket.getsockname()
+        self.udp_socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        apply_socket_options(self.udp_socket, sndbuf=sndbuf, rcvbuf=rcvbuf)
+        self.udp_socket.bind((self.host, self.port))
+
+    def start(self):
+        self.tcp_socket.listen(64)
+        threading.Thread(target=self.accept_connections, daemon=True).start()
+        threading.Thread(target=self.echo_datagrams, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.tcp_socket.close()
+        self.udp_socket.close()
+
+    def accept_connections(self):
+        while self.running:
+            try:
+                conn, addr = self.tcp_socket.accept()
+            except OSError:
+                break
+            apply_socket_options(conn, **self.options)
+            threading.Thread(target=self.handle_connection, args=(conn,), daemon=True).start()
+
+    def handle_connection(self, conn):
+        with conn:
+            try:
+                mode = recv_exact(conn, 1)
+                buffer = bytearray(1 << 20)
+                view = memoryview(buffer)
+                total = 0
+                while True:
+                    n = conn.recv_into(buffer)
+                    if not n:
+                        break
+                    total += n
+                    if mode == b'E':
+                        conn.sendall(view[:n])
+                if mode == b'S':
+                    conn.sendall(struct.pack('!Q', total))
+            except OSError:
+                pass
+
+    def echo_datagrams(self):
+        while self.running:
+            try:
+                data, addr = self.udp_socket.recvfrom(65535)
+                self.udp_socket.sendto(data, addr)
+            except OSError:
+                break
+
+def latency_summary(rtts):
+    rtts = sorted(rtts)
+    return {
+        "p50": percentile(rtts, 50),
+        "p90": percentile(rtts, 90),
+        "p99": percentile(rtts, 99),
+        "max": rtts[-1] if rtts else None,
+    }
+
+def run_streams(target, streams):
+    results = [None] * streams
+    errors = []
+
+    def run(i):
+        try:
+            results[i] = target()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(streams)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results
+
+def check_benchmark_args(payload_size, streams, duration):
+    if payload_size < 1:
+        raise ValueError(f"Payload size must be at least 1 byte, got {payload_size}")
+    if streams < 1:
+        raise ValueError(f"Streams must be at least 1, got {streams}")
+    if duration <= 0:
+        raise ValueError(f"Duration must be positive, got {duration}")
+
+def tcp_benchmark(host, port, payload_size=65536, streams=1, duration=5.0, mode='throughput', nodelay=False, sndbuf=None, rcvbuf=None):
+    '''
+    Run `streams` parallel TCP connections for `duration` seconds.
+    mode='throughput' streams payloads to the sink; mode='latency' sends one
+    payload at a time and waits for the echo, recording each round trip.
+    In latency mode each payload goes out in chunks no larger than the socket
+    buffers, reading each chunk's echo before sending the next, so a payload
+    bigger than the buffers can't leave both ends blocked on send.
+    '''
+    check_benchmark_args(payload_size, streams, duration)
+    payload = b'x' * payload_size
+    chunk = min(payload_size, LATENCY_CHUNK, *(size // 2 for size in (sndbuf, rcvbuf) if size))
+    chunk = max(chunk, 1)
+
+    def stream():
+        rtts = []
+        with socket.create_connection((host, port)) as s:
+            apply_socket_options(s, nodelay, sndbuf, rcvbuf)
+            s.sendall(b'S' if mode == 'throughput' else b'E')
+            start = time.perf_counter()
+            end = start + duration
+            sent = 0
+            while time.perf_counter() < end:
+                if mode == 'throughput':
+                    s.sendall(payload)
+                else:
+                    sent_at = time.perf_counter()
+                    for offset in range(0, payload_size, chunk):
+                        piece = payload[offset:offset + chunk]
+                        s.sendall(piece)
+                        recv_exact(s, len(piece))
+                    rtts.append((time.perf_counter() - sent_at) * 1000)
+                sent += payload_size
+            if mode == 'throughput':
+                s.shutdown(socket.SHUT_WR)
+                received = struct.unpack('!Q', recv_exact(s, 8))[0]
+            else:
+                received = sent
+            elapsed = time.perf_counter() - start
+        return received, elapsed, rtts
+
+    results = run_streams(stream, streams)
+    total_bytes = sum(r[0] for r in results)
+    elapsed = max(r[1] for r in results)
+    rtts = [rtt for r in results for rtt in r[2]]
+    report = {
+        "protocol": "tcp",
+        "mode": mode,
+        "streams": streams,
+        "payload_size": payload_size,
+        "nodelay": nodelay,
+        "bytes": total_bytes,
+        "seconds": round(elapsed, 3),
+        "gbit_per_s": round(total_bytes * 8 / elapsed / 1e9, 3),
+    }
+    if mode == 'latency':
+        report["rtt_ms"] = latency_summary(rtts)
+    return report
+
+def udp_benchmark(host, port, payload_size=1024, streams=1, duration=5.0, rate_mbps=100.0, sndbuf=None, rcvbuf=None, linger=0.5):
+    '''
+    Send sequence-numbered UDP packets at `rate_mbps` per stream for `duration`
+    seconds to the echo server. Packets not echoed back within `linger` seconds
+    of the end count as lost. A rate of 0 sends as fast as possible. Raises
+    ValueError if payload_size won't fit in a UDP datagram.
+    '''
+    check_benchmark_args(payload_size, streams, duration)
+    if rate_mbps < 0:
+        raise ValueError(f"Rate must not be negative, got {rate_mbps}")
+    if payload_size > UDP_MAX_PAYLOAD:
+        raise ValueError(f"UDP payload size must be at most {UDP_MAX_PAYLOAD} bytes, got {payload_size}")
+    payload_size = max(payload_size, UDP_HEADER.size)
+    padding = b'x' * (payload_size - UDP_HEADER.size)
+    interval = payload_size * 8 / (rate_mbps * 1e6) if rate_mbps else 0
+
+    def stream():
+        rtts = []
+        jitter = 0.0
+        previous_rtt = None
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as s:
+            apply_socket_options(s, sndbuf=sndbuf, rcvbuf=rcvbuf)
+            s.connect((host, port))
+            s.settimeout(0.05)
+            done = threading.Event()
+            received = set()
+
+            def receive():
+                nonlocal jitter, previous_rtt
+                while not done.is_set():
+                    try:
+                        data = s.recv(65535)
+                    except socket.timeout:
+                        continue
+                    except OSError:
+                        break
+                    now = time.perf_counter()
+                    try:
+                        seq, sent_at = UDP_HEADER.unpack_from(data)
+                    except struct.error:
+                        continue  # too short to be one of ours
+                    if seq in received:
+                        continue
+                    received.add(seq)
+                    rtt = (now - sent_at) * 1000
+                    rtts.append(rtt)
+                    if previous_rtt is not None:
+                        jitter += (abs(rtt - previous_rtt) - jitter) / 16
+                    previous_rtt = rtt
+
+            receiver = threading.Thread(target=receive)
+            receiver.start()
+            try:
+                start = time.perf_counter()
+                end = start + duration
+                sent = 0
+                next_send = start
+                while True:
+                    now = time.perf_counter()
+                    if now >= end:
+                        break
+                    if now < next_send:
+                        time.sleep(min(next_send - now, 0.001))
+                        continue
+                    try:
+                        s.send(UDP_HEADER.pack(sent, now) + padding)
+                    except socket.timeout:
+                        pass  # full send buffer; the packet counts as lost
+                    except OSError as e:
+                        if e.errno not in (errno.ENOBUFS, errno.EAGAIN, errno.EWOULDBLOCK):
+                            raise
+                    sent += 1
+                    next_send += interval
+                elapsed = time.perf_counter() - start
+                time.sleep(linger)
+            finally:
+                done.set()
+                receiver.join()
+        return sent, len(received), elapsed, jitter, rtts
+
+    results = run_streams(stream, streams)
+    sent = sum(r[0] for r in results)
+    received = sum(r[1] for r in results)
+    elapsed = max(r[2] for r in results)
+    rtts = [rtt for r in results for rtt in r[4]]
+    return {
+        "protocol": "udp",
+        "streams": streams,
+        "payload_size": payload_size,
+        "packets_sent": sent,
+        "packets_received": received,
+        "loss_pct": round((sent - received) / sent * 100, 3) if sent else None,
+        "jitter_ms": round(sum(r[3] for r in results) / streams, 4),
+        "bytes": received * payload_size,
+        "seconds": round(elapsed, 3),
+        "gbit_per_s": round(received * payload_size * 8 / elapsed / 1e9, 3),
+        "rtt_ms": latency_summary(rtts),
+    }
+
+def print_benchmark_report(report):
+    print(f"{report['protocol'].upper()} benchmark: {report['streams']} stream(s), {report['payload_size']}-byte payloads")
+    print(f"  Throughput: {report['gbit_per_s']:.3f} Gbit/s ({report['bytes']} bytes in {report['seconds']} s)")
+    if report['protocol'] == 'udp':
+        print(f"  Packets: {report['packets_received']}/{report['packets_sent']} received, {report['loss_pct']}% loss")
+        print(f"  Jitter: {report['jitter_ms']} ms")
+    rtt = report.get('rtt_ms')
+    if rtt and rtt['p50'] is not None:
+        print(f"  RTT ms: p50 {rtt['p50']:.3f}  p90 {rtt['p90']:.3f}  p99 {rtt['p99']:.3f}  max {rtt['max']:.3f}")
+
+def socket_benchmark():
+    server = BenchServer().start()
+    try:
+        print(f"Bundled benchmark server on {server.host}:{server.port}")
+        print_benchmark_report(tcp_benchmark(server.host, server.port, duration=2.0))
+        print_benchmark_report(tcp_benchmark(server.host, server.port, payload_size=64, duration=2.0, mode='latency', nodelay=True))
+        print_benchmark_report(udp_benchmark(server.host, server.port, duration=2.0))
+    finally:
+        server.stop()
+
+# Shared session so repeated requests reuse keep-alive connections
+http_session = requests.Session()
+
 # 3. HTTP GET Request using requests library
 def http_get():
-    response = requests.get('https://api.github.com/events')
+    response = http_session.get('https://api.github.com/events')
     print("HTTP GET Status Code:", response.status_code)
     print("HTTP GET Content:", response.json()[:2])
 
 # 4. HTTP POST Request using requests library
 def http_post():
     data = {'key': 'value'}
-    response = requests.post('https://httpbin.org/post', data=data)
+    response = http_session.post('https://httpbin.org/post', data=data)
     print("HTTP POST Status Code:", response.status_code)
     print("HTTP POST Content:", response.json())
 
@@ -58,6 +373,145 @@ async def async_http():
     for url, response in zip(urls, responses):
         print(f"Async HTTP Response from {url}: {response[:50]}...")
 
+# 5b. Batched HTTP probing
+URL_PATTERN = re.compile(r"https?://[^\s\"'<>)\]]+")
+
+def load_urls(path):
+    '''
+    Read URLs from a file. Each line is either a plain URL or a JSON object
+    (JSONL). Objects use their "url" field if present; otherwise every URL
+    found in their string values is used, so files like requests.jsonl work too.
+    Blank lines and lines starting with # are skipped, and malformed JSON
+    lines are reported on stderr and skipped.
+    '''
+    urls = []
+    with open(path) as file:
+        for number, line in enumerate(file, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            if not line.startswith('{'):
+                urls.append(line)
+                continue
+            try:
+                item = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"Skipping line {number} of {path}: {e}", file=sys.stderr)
+                continue
+            if not isinstance(item, dict):
+                print(f"Skipping line {number} of {path}: not a JSON object", file=sys.stderr)
+                continue
+            if isinstance(item.get('url'), str):
+                urls.append(item['url'])
+                continue
+            for value in item.values():
+                if isinstance(value, str):
+                    urls.extend(match.rstrip('.,;:') for match in URL_PATTERN.findall(value))
+    return urls
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    # Nearest-rank percentile
+    index = max(0, min(len(sorted_values) - 1, math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def host_key(url):
+    try:
+        return urlsplit(url).netloc
+    except ValueError:
+        return url  # unparseable; probe() reports the error
+
+async def fetch_bytes(session, url):
+    async with session.get(url) as response:
+        body = await response.read()
+    return response.status, body
+
+async def probe(session, semaphore, host_semaphore, url, timeout, retries):
+    '''
+    Fetch url, retrying connection errors, timeouts and 5xx responses.
+    Both semaphores are held only while an attempt is running, so latency and
+    the per-attempt timeout exclude time spent queued, and backoff sleeps
+    don't hold a slot. Any failure is recorded in the result's "error".
+    '''
+    result = {"url": url, "status": None, "bytes": 0, "latency_ms": None, "attempts": 0, "error": None}
+    for attempt in range(retries + 1):
+        result["attempts"] = attempt + 1
+        async with host_semaphore, semaphore:
+            start = time.perf_counter()
+            try:
+                status, body = await asyncio.wait_for(fetch_bytes(session, url), timeout)
+                result["latency_ms"] = round((time.perf_counter() - start) * 1000, 3)
+                result["status"] = status
+                result["bytes"] = len(body)
+                result["error"] = None
+                if status < 500:
+                    break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                result["error"] = str(e) or type(e).__name__
+            except Exception as e:
+                # Not worth retrying, e.g. a malformed URL
+                result["error"] = f"{type(e).__name__}: {e}"
+                break
+        if attempt < retries:
+            await asyncio.sleep(0.1 * 2 ** attempt)
+    return result
+
+async def batch_http(urls, concurrency=20, per_host=4, timeout=10.0, retries=2, out=None):
+    '''
+    Fetch every URL through one keep-alive aiohttp session and write one JSON
+    line per result as it completes, followed by a summary line with
+    requests/s and latency percentiles. Returns the summary.
+
+    concurrency caps requests in flight overall, per_host caps requests in
+    flight to any single host, timeout limits each attempt from sending the
+    request to reading the whole body, and failed requests (connection errors,
+    timeouts, 5xx) are retried up to `retries` times.
+    '''
+    if concurrency < 1 or per_host < 1:
+        raise ValueError("concurrency and per_host must be at least 1")
+    if retries < 0:
+        raise ValueError("retries must not be negative")
+    if timeout <= 0:
+        raise ValueError("timeout must be positive")
+    out = out or sys.stdout
+    semaphore = asyncio.Semaphore(concurrency)
+    host_semaphores = {}
+    for url in urls:
+        host = host_key(url)
+        if host not in host_semaphores:
+            host_semaphores[host] = asyncio.Semaphore(per_host)
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host)
+    # probe() enforces the per-attempt deadline itself, after any queueing
+    client_timeout = aiohttp.ClientTimeout(total=None)
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        tasks = [asyncio.ensure_future(probe(session, semaphore, host_semaphores[host_key(url)], url, timeout, retries))
+                 for url in urls]
+        for task in asyncio.as_completed(tasks):
+            result = await task
+            if result["error"] is None and result["status"] < 500:
+                latencies.append(result["latency_ms"])
+            else:
+                errors += 1
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+    elapsed = time.perf_counter() - start
+    summary = {
+        "summary": True,
+        "requests": len(urls),
+        "ok": len(latencies),
+        "errors": errors,
+        "elapsed_s": round(elapsed, 3),
+        "requests_per_s": round(len(urls) / elapsed, 2) if elapsed > 0 else None,
+        "latency_ms": latency_summary(latencies),
+    }
+    out.write(json.dumps(summary) + "\n")
+    out.flush()
+    return summary
+
 # 6. Email sending using SMTP
 def send_email():
     sender = 'sender@example.com'
@@ -108,6 +562,8 @@ def print_menu():
     print("6. Email Sending (requires configuration)")
     print("7. FTP Transfer (requires configuration)")
     print("8. SSH Command Execution (requires configuration)")
+    print("9. Batch HTTP Probe")
+    print("10. TCP/UDP Benchmark (local)")
     print("0. Exit")
     
 # Main function to run all examples
@@ -152,10 +608,100 @@ def main():
             confirm = input("Do you want to proceed? (y/n): ")
             if confirm.lower() == 'y':
                 ssh_command()
+        elif choice == '9':
+            print("\nBatch HTTP Probe")
+            path = input("File with URLs (one per line or JSONL): ")
+            try:
+                urls = load_urls(path)
+            except OSError as e:
+                print(f"Could not read {path}: {e}")
+            else:
+                asyncio.run(batch_http(urls))
+        elif choice == '10':
+            print("\nRunning TCP/UDP Benchmark against the bundled local server")
+            socket_benchmark()
         else:
             print("Invalid choice. Please try again.")
         
         input("\nPress Enter to continue...")
 
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+def non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative, got {value}")
+    return number
+
+def non_negative_float(value):
+    number = float(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative, got {value}")
+    return number
+
+def positive_float(value):
+    number = float(value)
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {value}")
+    return number
+
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Python Networking Examples")
+    parser.add_argument("--batch", metavar="FILE", help="Probe every URL in FILE and print JSONL results instead of showing the menu")
+    parser.add_argument("--concurrency", type=positive_int, default=20, help="Maximum requests in flight (default 20)")
+    parser.add_argument("--per-host", type=positive_int, default=4, help="Maximum connections per host (default 4)")
+    parser.add_argument("--timeout", type=positive_float, default=10.0, help="Timeout per attempt in seconds (default 10)")
+    parser.add_argument("--retries", type=non_negative_int, default=2, help="Retries for failed requests (default 2)")
+    parser.add_argument("--bench", choices=["tcp", "udp"], help="Run a socket benchmark instead of showing the menu")
+    parser.add_argument("--serve", action="store_true", help="Run only the benchmark server (use with --port)")
+    parser.add_argument("--host", help="Benchmark server host (default: start the bundled server locally)")
+    parser.add_argument("--port", type=int, default=5201, help="Benchmark server port (default 5201)")
+    parser.add_argument("--latency", action="store_true", help="TCP: measure echo round trips instead of throughput")
+    parser.add_argument("--size", type=positive_int, help="Payload size in bytes (default 65536 for TCP, 1024 for UDP)")
+    parser.add_argument("--streams", type=positive_int, default=1, help="Parallel streams (default 1)")
+    parser.add_argument("--duration", type=positive_float, default=5.0, help="Seconds per stream (default 5)")
+    parser.add_argument("--rate", type=non_negative_float, default=100.0, help="UDP send rate per stream in Mbit/s, 0 for unlimited (default 100)")
+    parser.add_argument("--nodelay", action="store_true", help="Set TCP_NODELAY")
+    parser.add_argument("--sndbuf", type=positive_int, help="SO_SNDBUF size in bytes")
+    parser.add_argument("--rcvbuf", type=positive_int, help="SO_RCVBUF size in bytes")
+    args = parser.parse_args()
+
+    if args.batch:
+        try:
+            urls = load_urls(args.batch)
+        except OSError as e:
+            sys.exit(f"Could not read {args.batch}: {e}")
+        asyncio.run(batch_http(urls, args.concurrency, args.per_host, args.timeout, args.retries))
+    elif args.serve:
+        server = BenchServer(host=args.host or '0.0.0.0', port=args.port, nodelay=args.nodelay, sndbuf=args.sndbuf, rcvbuf=args.rcvbuf).start()
+        print(f"Benchmark server listening on {server.host}:{server.port} (TCP and UDP)")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            server.stop()
+    elif args.bench:
+        server = None
+        host, port = args.host, args.port
+        if host is None:
+            server = BenchServer(nodelay=args.nodelay, sndbuf=args.sndbuf, rcvbuf=args.rcvbuf).start()
+            host, port = server.host, server.port
+        try:
+            if args.bench == 'tcp':
+                report = tcp_benchmark(host, port, args.size or 65536, args.streams, args.duration,
+                                       'latency' if args.latency else 'throughput', args.nodelay, args.sndbuf, args.rcvbuf)
+            else:
+                report = udp_benchmark(host, port, args.size or 1024, args.streams, args.duration,
+                                       args.rate, args.sndbuf, args.rcvbuf)
+            print_benchmark_report(report)
+        except (ValueError, OSError) as e:
+            sys.exit(f"Benchmark failed: {e}")
+        finally:
+            if server:
+                server.stop()
+    else:
+        main()
\ No newline at end of file
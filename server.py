@@ -6,6 +6,8 @@ import sys
 import json
 import time
 import argparse
+import itertools
+from history_index import HistoryIndex, parse_search_args, tokenize
 
 '''
 server.py - A simple chat server that allows clients to connect and send/receive messages.
@@ -16,16 +18,111 @@ All messages are broadcast to all connected clients.
 Commands:
 - /kick [username]: Kick a user from the server.
 - /list: List all connected users.
+- /search <terms> [--user X] [--since T]: Search the message history.
 - /help: Display a list of available commands.
 - /quit: Shut down the server.
 -
 
+Commands from clients and the console are not run on the thread that read them.
+They are handed to a CommandExecutor, a small pool of worker threads fed by a
+bounded priority queue. Command replies are put on the message queue like any
+other outbound message, so reading from clients and broadcasting never wait on
+a command.
+
 The server can be stopped by sending a SIGINT signal (Ctrl+C).
 '''
 
 
+class CommandExecutor:
+    '''
+    Runs commands on a fixed pool of worker threads.
+
+    Jobs are ordered by priority (lower numbers run first), then by arrival.
+    The pending queue is bounded: submit() returns False when it is full so the
+    caller can tell the user the server is busy. Each job has a timeout measured
+    from submission; a job that is still waiting when it expires is dropped, and
+    any reply it tries to send after expiring is replaced by a single timeout error.
+    Python threads can't be interrupted, so a handler that overruns still finishes,
+    but its late output never reaches the user.
+    '''
+
+    def __init__(self, server, workers=4, max_pending=100):
+        if workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.server = server
+        self.num_workers = workers
+        self.jobs = queue.PriorityQueue(maxsize=max_pending)
+        self.sequence = itertools.count()
+        self.threads = []
+        self.running = False
+
+    def start(self):
+        self.running = True
+        for i in range(self.num_workers):
+            thread = threading.Thread(target=self.worker, name=f"command-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self):
+        self.running = False
+
+    def submit(self, handler, args, client_socket=None, priority=1, timeout=5.0):
+        job = CommandJob(self.server, handler, args, client_socket, timeout)
+        try:
+            self.jobs.put_nowait((priority, next(self.sequence), job))
+        except queue.Full:
+            return False
+        return True
+
+    def worker(self):
+        while self.running:
+            try:
+                priority, _, job = self.jobs.get(timeout=1.0)
+            except queue.Empty:
+                continue
+            try:
+                if job.expired():
+                    job.reply("Error: Command timed out")
+                    continue
+                job.run()
+            except Exception as e:
+                self.server.log(f"Command {job.handler.__name__} failed: {e}")
+            finally:
+                self.jobs.task_done()
+
+
+class CommandJob:
+    def __init__(self, server, handler, args, client_socket, timeout):
+        self.server = server
+        self.handler = handler
+        self.args = args
+        self.client_socket = client_socket
+        self.deadline = time.monotonic() + timeout
+        self.timed_out = False
+
+    def expired(self):
+        return time.monotonic() > self.deadline
+
+    def run(self):
+        # Console commands take just their args; client commands also get the job to reply through
+        if self.client_socket is None:
+            self.handler(self.args)
+        else:
+            self.handler(self, self.args)
+
+    def reply(self, message, client_socket=None):
+        '''Send a reply to the requester, or to client_socket if given.'''
+        if self.timed_out:
+            return
+        if self.expired():
+            self.timed_out = True
+            client_socket = None
+            message = "Error: Command timed out"
+        self.server.send_to(client_socket or self.client_socket, message)
+
+
 class ChatServer:
-    def __init__(self, host='127.0.0.1', port=12344, debug=False):
+    def __init__(self, host='127.0.0.1', port=12344, debug=False, workers=4, index_size=100000):
         self.host = host
         self.port = port
         self.server_socket = None
@@ -34,17 +131,39 @@ class ChatServer:
         self.running = True
         self.chat_history = []
         self.max_history = 50
+        self.history_index = HistoryIndex(capacity=index_size)
+        self.max_search_results = 20
+        # Clients read 1024 bytes at a time, so keep each search reply within one read
+        self.max_search_reply_bytes = 1000
+        self.max_search_line_length = 200
         self.debug = debug
         self.commands = {
             '/help': self.cmd_help,
             '/users': self.cmd_users,
             '/kick': self.cmd_kick,
+            '/search': self.cmd_search,
+        }
+        self.client_commands = {
+            '/whisper': self.cmd_whisper,
+            '/users': self.send_user_list,
+            '/help': self.send_help,
+            '/search': self.cmd_client_search,
         }
+        # (priority, timeout in seconds); lower priority numbers run first
+        self.command_settings = {
+            '/whisper': (0, 2.0),
+            '/kick': (0, 5.0),
+            '/search': (2, 10.0),
+        }
+        self.default_command_settings = (1, 5.0)
+        self.executor = CommandExecutor(self, workers=workers)
         self.help_menu = """
 Available server commands:
 /help               - Display this help menu
 /users              - List all connected users
 /kick <username>    - Kick a user from the server
+/search <terms> [--user X] [--since T]
+                    - Search message history (T is e.g. 30m, 2h, 1d or a unix time)
 quit                - Shut down the server
 
 Note: Regular messages will be broadcast to all users.
@@ -87,6 +206,7 @@ Note: Regular messages will be broadcast to all users.
         signal.signal(signal.SIGINT, self.signal_handler)
         signal.signal(signal.SIGTERM, self.signal_handler)
 
+        self.executor.start()
         threading.Thread(target=self.accept_connections, daemon=True).start()
         threading.Thread(target=self.process_messages, daemon=True).start()
 
@@ -121,6 +241,7 @@ Note: Regular messages will be broadcast to all users.
 
     def shutdown(self):
         self.running = False
+        self.executor.stop()
         self.broadcast("Server is shutting down.")
         for client_socket in list(self.clients.keys()):
             self.remove_client(client_socket)
@@ -166,7 +287,7 @@ Note: Regular messages will be broadcast to all users.
                 if message.startswith('/'):
                     self.handle_client_command(client_socket, message)
                 else:
-                    self.message_queue.put((username, f"{username}: {message}"))
+                    self.message_queue.put((username, f"{username}: {message}", None))
         except (ConnectionResetError, OSError):
             pass
         finally:
@@ -196,15 +317,39 @@ Note: Regular messages will be broadcast to all users.
     def broadcast(self, message):
         if not message.startswith("SERVER:"):
             message = f"SERVER: {message}"
-        self.message_queue.put(("SERVER", message))
+        self.message_queue.put(("SERVER", message, None))
+
+    def send_to(self, client_socket, message):
+        '''Queue a message for a single client, or print it if client_socket is None (the console).'''
+        if client_socket is None:
+            print(message)
+            return
+        self.message_queue.put(("DIRECT", message, client_socket))
+
+    def disconnect(self, client_socket):
+        '''Queue the removal of a client, after any messages already queued for it are sent.'''
+        self.message_queue.put(("DISCONNECT", None, client_socket))
 
     def process_messages(self):
         while self.running:
             try:
-                username, message = self.message_queue.get(timeout=1.0)
+                username, message, recipient = self.message_queue.get(timeout=1.0)
+                if recipient is not None and message is None:
+                    self.remove_client(recipient)
+                    continue
+                if recipient is not None:
+                    self.log(f"Sending direct message: {message}")
+                    if recipient in self.clients:
+                        try:
+                            recipient.send(message.encode())
+                        except OSError:
+                            self.remove_client(recipient)
+                    continue
                 self.log(f"Processing message: {message}")
                 print(f"{message}")
-                self.chat_history.append({"username": username, "message": message, "timestamp": time.time()})
+                timestamp = time.time()
+                self.chat_history.append({"username": username, "message": message, "timestamp": timestamp})
+                self.history_index.add(username, message, timestamp)
                 if len(self.chat_history) > self.max_history:
                     self.chat_history.pop(0)
                 for client in list(self.clients.keys()):
@@ -225,7 +370,7 @@ Note: Regular messages will be broadcast to all users.
         args = parts[1:]
 
         if cmd in self.commands:
-            self.commands[cmd](args)
+            self.submit_command(cmd, self.commands[cmd], args)
         else:
             print(f"Unknown command: {cmd}")
             print("Type '/help' for a list of available commands.")
@@ -235,22 +380,21 @@ Note: Regular messages will be broadcast to all users.
         cmd = parts[0].lower()
         args = parts[1:]
 
-        if cmd == '/whisper' and len(args) >= 2:
-            target_username = args[0]
-            message = ' '.join(args[1:])
-            self.whisper(client_socket, target_username, message)
-        elif cmd == '/users':
-            self.send_user_list(client_socket)
-        elif cmd == '/help':
-            self.send_help(client_socket)
+        if cmd in self.client_commands:
+            self.submit_command(cmd, self.client_commands[cmd], args, client_socket)
         else:
-            client_socket.send("Error: Unknown command".encode())
+            self.send_to(client_socket, "Error: Unknown command")
+
+    def submit_command(self, cmd, handler, args, client_socket=None):
+        priority, timeout = self.command_settings.get(cmd, self.default_command_settings)
+        if not self.executor.submit(handler, args, client_socket, priority, timeout):
+            self.send_to(client_socket, "Error: Server is busy, please try again.")
 
     def cmd_help(self, args):
         print(self.help_menu)
 
     def cmd_users(self, args):
-        users = [info["username"] for info in self.clients.values()]
+        users = [info["username"] for info in list(self.clients.values())]
         print("Connected users: " + ", ".join(users))
 
     def cmd_kick(self, args):
@@ -263,20 +407,62 @@ Note: Regular messages will be broadcast to all users.
     def kick_user(self, username):
         for client, info in list(self.clients.items()):
             if info["username"] == username:
-                client.send("You have been kicked from the server.".encode())
-                self.remove_client(client)
+                self.send_to(client, "You have been kicked from the server.")
+                self.disconnect(client)
                 print(f"Kicked user: {username}")
                 self.broadcast(f"{username} has been kicked from the chat.")
                 return
         print(f"User {username} not found.")
 
-    def whisper(self, sender_socket, target_username, message):
+    def cmd_search(self, args):
+        print(self.search_history(args))
+
+    def cmd_client_search(self, job, args):
+        job.reply(self.search_history(args))
+
+    def search_history(self, args):
+        usage = "Usage: /search <terms> [--user X] [--since T]"
+        try:
+            terms, user, since = parse_search_args(args)
+        except ValueError as e:
+            return f"Error: {e}\n{usage}"
+        if not any(tokenize(term) for term in terms) and user is None:
+            return usage
+        results = self.history_index.search(terms, user, since, limit=self.max_search_results)
+        if not results:
+            return "No matching messages."
+        header = "Search results (newest first):"
+        footer = ""
+        if results.truncated:
+            footer = "(search stopped early; there may be more matches)"
+        lines = []
+        # Leave room for a footer line
+        size = len(header.encode()) + 60
+        for timestamp, username, message in results:
+            if len(message) > self.max_search_line_length:
+                message = message[:self.max_search_line_length - 3] + "..."
+            line = f"[{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))}] {message}"
+            size += len(line.encode()) + 1
+            if size > self.max_search_reply_bytes:
+                footer = "(more results omitted; narrow the search)"
+                break
+            lines.append(line)
+        return "\n".join([header] + lines + ([footer] if footer else []))
+
+    def cmd_whisper(self, job, args):
+        if len(args) < 2:
+            job.reply("Usage: /whisper <username> <message>")
+            return
+        self.whisper(job, args[0], ' '.join(args[1:]))
+
+    def whisper(self, job, target_username, message):
+        sender_socket = job.client_socket
         sender_username = self.clients[sender_socket]["username"]
-        for client, info in self.clients.items():
+        for client, info in list(self.clients.items()):
             if info["username"] == target_username:
                 whisper_message = f"[Whisper from {sender_username} to {target_username}]: {message}"
-                client.send(f"[Whisper from {sender_username}]: {message}".encode())
-                sender_socket.send(f"[Whisper to {target_username}]: {message}".encode())
+                job.reply(f"[Whisper from {sender_username}]: {message}", client)
+                job.reply(f"[Whisper to {target_username}]: {message}")
                 
                 # Log the whisper in the server console
                 print(f"\r{whisper_message}")
@@ -288,26 +474,38 @@ Note: Regular messages will be broadcast to all users.
                     self.chat_history.pop(0)
                 
                 return
-        sender_socket.send(f"Error: User {target_username} not found".encode())
+        job.reply(f"Error: User {target_username} not found")
 
-    def send_user_list(self, client_socket):
-        user_list = [info["username"] for info in self.clients.values()]
-        client_socket.send(f"Online users: {', '.join(user_list)}".encode())
+    def send_user_list(self, job, args):
+        user_list = [info["username"] for info in list(self.clients.values())]
+        job.reply(f"Online users: {', '.join(user_list)}")
 
-    def send_help(self, client_socket):
+    def send_help(self, job, args):
         help_message = """
 Available commands:
 /whisper <username> <message> - Send a private message
 /users - See a list of online users
+/search <terms> [--user X] [--since T] - Search message history
 /help - Display this help message
 """
-        client_socket.send(help_message.encode())
+        job.reply(help_message)
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Chat Server")
     parser.add_argument("-d", "--debug", action="store_true", help="Enable debug mode")
     parser.add_argument("-p", "--port", type=int, default=12345, help="Port to run the server on")
+    parser.add_argument("-w", "--workers", type=positive_int, default=4, help="Number of command worker threads")
+    parser.add_argument("--index-size", type=positive_int, default=100000, help="Number of messages kept for /search")
     args = parser.parse_args()
 
-    server = ChatServer(port=args.port, debug=args.debug)
+    try:
+        server = ChatServer(port=args.port, debug=args.debug, workers=args.workers, index_size=args.index_size)
+    except ValueError as e:
+        parser.error(str(e))
     server.start()
\ No newline at end of file
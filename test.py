@@ -3,8 +3,9 @@ import threading
 import time
 import socket
 import argparse
-from server import ChatServer
+from server import ChatServer, CommandExecutor
 from client import ChatClient
+from history_index import HistoryIndex, parse_search_args
 
 class TestChatSystem(unittest.TestCase):
     
@@ -123,5 +124,145 @@ class TestChatSystem(unittest.TestCase):
         self.assertEqual(len(self.server.chat_history), 5)
         self.assertEqual(self.server.chat_history[-1]['message'], "SERVER: Test message 9")
 
+class TestCommandExecutor(unittest.TestCase):
+
+    def setUp(self):
+        # A server that is never started, so replies stay on its message queue
+        self.server = ChatServer(port=0)
+        self.client = object()
+
+    def replies(self):
+        replies = []
+        while not self.server.message_queue.empty():
+            username, message, recipient = self.server.message_queue.get_nowait()
+            replies.append((message, recipient))
+        return replies
+
+    def test_priority_order(self):
+        # Queue jobs before starting workers so priority alone decides the order
+        executor = CommandExecutor(self.server, workers=1)
+        handler = lambda job, args: job.reply(args[0])
+        executor.submit(handler, ["low"], self.client, priority=2)
+        executor.submit(handler, ["high"], self.client, priority=0)
+        executor.submit(handler, ["normal"], self.client, priority=1)
+        executor.start()
+        executor.jobs.join()
+        executor.stop()
+        self.assertEqual([m for m, _ in self.replies()], ["high", "normal", "low"])
+
+    def test_bounded_queue(self):
+        executor = CommandExecutor(self.server, workers=1, max_pending=2)
+        handler = lambda job, args: None
+        self.assertTrue(executor.submit(handler, [], self.client))
+        self.assertTrue(executor.submit(handler, [], self.client))
+        self.assertFalse(executor.submit(handler, [], self.client))
+
+    def test_expired_job_is_dropped(self):
+        executor = CommandExecutor(self.server, workers=1)
+        ran = []
+        executor.submit(lambda job, args: ran.append(True), [], self.client, timeout=0.0)
+        time.sleep(0.01)
+        executor.start()
+        executor.jobs.join()
+        executor.stop()
+        self.assertEqual(ran, [])
+        self.assertEqual(self.replies(), [("Error: Command timed out", self.client)])
+
+    def test_client_command_does_not_block(self):
+        # The recv thread only queues the command; a worker sends the reply later
+        self.server.clients[self.client] = {"username": "User1", "addr": None}
+        self.server.handle_client_command(self.client, "/users")
+        self.assertEqual(self.replies(), [])
+        self.server.executor.start()
+        self.server.executor.jobs.join()
+        self.server.executor.stop()
+        self.assertEqual(self.replies(), [("Online users: User1", self.client)])
+
+    def test_invalid_worker_count(self):
+        with self.assertRaises(ValueError):
+            CommandExecutor(self.server, workers=0)
+
+    def test_kick_goes_through_outbound_queue(self):
+        # The kick notice is queued ahead of the disconnect so the client receives it first
+        self.server.clients[self.client] = {"username": "User1", "addr": None}
+        self.server.kick_user("User1")
+        self.assertIn(self.client, self.server.clients)
+        items = []
+        while not self.server.message_queue.empty():
+            items.append(self.server.message_queue.get_nowait())
+        self.assertEqual(items[0], ("DIRECT", "You have been kicked from the server.", self.client))
+        self.assertEqual(items[1], ("DISCONNECT", None, self.client))
+
+
+class TestHistoryIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = HistoryIndex(capacity=5)
+        self.index.add("alice", "alice: Deploy the new server today", 100)
+        self.index.add("bob", "bob: the server is down", 200)
+        self.index.add("alice", "alice: server back up", 300)
+
+    def test_search_terms(self):
+        results = self.index.search(["server"])
+        self.assertEqual([r[2] for r in results], ["alice: server back up", "bob: the server is down", "alice: Deploy the new server today"])
+        self.assertEqual(self.index.search(["SERVER", "down"]), [(200, "bob", "bob: the server is down")])
+        self.assertEqual(self.index.search(["missing"]), [])
+
+    def test_search_user_and_since(self):
+        self.assertEqual([r[0] for r in self.index.search(["server"], user="Alice")], [300, 100])
+        self.assertEqual([r[0] for r in self.index.search(["server"], since=150)], [300, 200])
+        self.assertEqual([r[0] for r in self.index.search(user="bob", since=250)], [])
+
+    def test_eviction_bounds_memory(self):
+        for i in range(5):
+            self.index.add("carol", f"carol: message {i}", 400 + i)
+        self.assertEqual(len(self.index), 5)
+        self.assertEqual(self.index.search(["server"]), [])
+        self.assertNotIn("server", self.index.words)
+        self.assertNotIn("alice", self.index.users)
+        self.assertEqual(len(self.index.search(["message"], limit=3)), 3)
+
+    def test_byte_bound(self):
+        index = HistoryIndex(capacity=100, max_bytes=5000)
+        for i in range(1000):
+            index.add("mallory", f"mallory: unique{i} token{i} words{i}")
+        self.assertLessEqual(index.size_bytes, 5000)
+        self.assertLess(len(index), 100)
+        self.assertEqual(len(index.search(["mallory"], limit=1000)), len(index))
+
+    def test_invalid_capacity(self):
+        with self.assertRaises(ValueError):
+            HistoryIndex(capacity=0)
+        with self.assertRaises(ValueError):
+            HistoryIndex(capacity=1000, max_bytes=8000)
+
+    def test_scan_budget(self):
+        # Common words that never appear together force a long intersection
+        index = HistoryIndex(capacity=1000, max_steps=50)
+        for i in range(500):
+            index.add("alice", "alice: hello")
+            index.add("bob", "bob: world")
+        results = index.search(["hello", "world"])
+        self.assertEqual(results, [])
+        self.assertTrue(results.truncated)
+        self.assertFalse(index.search(["hello"], user="alice").truncated)
+
+    def test_search_history_reply(self):
+        server = ChatServer(port=0)
+        self.assertTrue(server.search_history(["!!!"]).startswith("Usage"))
+        for i in range(50):
+            server.history_index.add("bob", "bob: héllo " + "é" * 300)
+        reply = server.search_history(["héllo"])
+        self.assertLessEqual(len(reply.encode()), server.max_search_reply_bytes)
+        self.assertIn("more results omitted", reply)
+
+    def test_parse_search_args(self):
+        terms, user, since = parse_search_args(["server", "down", "--user", "bob", "--since", "1700000000"])
+        self.assertEqual((terms, user, since), (["server", "down"], "bob", 1700000000.0))
+        terms, user, since = parse_search_args(["--since", "2h", "outage"])
+        self.assertAlmostEqual(since, time.time() - 7200, delta=5)
+        with self.assertRaises(ValueError):
+            parse_search_args(["--user"])
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,202 @@
+import unittest
+import asyncio
+import io
+import json
+import os
+import tempfile
+import importlib.util
+from aiohttp import web
+
+# Tests for networking-demo.py, kept apart from test.py so the chat tests don't
+# need requests, aiohttp and paramiko installed.
+
+def load_networking_demo():
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "networking-demo.py")
+    spec = importlib.util.spec_from_file_location("networking_demo", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+networking_demo = load_networking_demo()
+
+class TestBatchHttp(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        # A local aiohttp server standing in for the real hosts
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.flaky_calls = 0
+        app = web.Application()
+        app.router.add_get('/ok', self.handle_ok)
+        app.router.add_get('/slow', self.handle_slow)
+        app.router.add_get('/flaky', self.handle_flaky)
+        app.router.add_get('/broken', self.handle_broken)
+        app.router.add_get('/trickle', self.handle_trickle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, '127.0.0.1', 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        self.base = f"http://127.0.0.1:{port}"
+
+    async def asyncTearDown(self):
+        await self.runner.cleanup()
+
+    async def handle_ok(self, request):
+        return web.Response(text="ok")
+
+    async def handle_slow(self, request):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.05)
+        self.in_flight -= 1
+        return web.Response(text="slow")
+
+    async def handle_flaky(self, request):
+        self.flaky_calls += 1
+        if self.flaky_calls == 1:
+            return web.Response(status=503)
+        return web.Response(text="recovered")
+
+    async def handle_broken(self, request):
+        return web.Response(status=500)
+
+    async def handle_trickle(self, request):
+        # Keeps every socket read short but takes a second overall
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for _ in range(10):
+            await response.write(b"x")
+            await asyncio.sleep(0.1)
+        return response
+
+    async def run_batch(self, urls, **kwargs):
+        out = io.StringIO()
+        summary = await networking_demo.batch_http(urls, out=out, **kwargs)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        return summary, lines
+
+    async def test_streams_results_and_summary(self):
+        urls = [f"{self.base}/ok"] * 10
+        summary, lines = await self.run_batch(urls)
+        self.assertEqual(len(lines), 11)
+        self.assertTrue(all(line["status"] == 200 and line["bytes"] == 2 for line in lines[:-1]))
+        self.assertEqual(lines[-1], summary)
+        self.assertEqual((summary["requests"], summary["ok"], summary["errors"]), (10, 10, 0))
+        self.assertIsNotNone(summary["latency_ms"]["p99"])
+
+    async def test_per_host_limit(self):
+        summary, lines = await self.run_batch([f"{self.base}/slow"] * 12, concurrency=10, per_host=3)
+        self.assertEqual(summary["ok"], 12)
+        self.assertLessEqual(self.max_in_flight, 3)
+
+    async def test_retries(self):
+        summary, lines = await self.run_batch([f"{self.base}/flaky", f"{self.base}/broken"], retries=1)
+        results = {line["url"]: line for line in lines[:-1]}
+        self.assertEqual(results[f"{self.base}/flaky"]["status"], 200)
+        self.assertEqual(results[f"{self.base}/flaky"]["attempts"], 2)
+        self.assertEqual(results[f"{self.base}/broken"]["attempts"], 2)
+        self.assertEqual(summary["errors"], 1)
+
+    async def test_queueing_not_counted(self):
+        # With one connection per host, later requests wait their turn; that wait
+        # must count against neither the latency nor the timeout
+        summary, lines = await self.run_batch([f"{self.base}/slow"] * 6, per_host=1, timeout=0.2, retries=0)
+        self.assertEqual(summary["errors"], 0)
+        self.assertLess(max(line["latency_ms"] for line in lines[:-1]), 150)
+
+    async def test_timeout(self):
+        summary, lines = await self.run_batch([f"{self.base}/slow"], timeout=0.01, retries=0)
+        self.assertEqual(summary["errors"], 1)
+        self.assertIsNotNone(lines[0]["error"])
+
+    async def test_timeout_covers_whole_attempt(self):
+        summary, lines = await self.run_batch([f"{self.base}/trickle"], timeout=0.3, retries=0)
+        self.assertEqual(summary["errors"], 1)
+        self.assertIsNone(lines[0]["status"])
+        self.assertIsNotNone(lines[0]["error"])
+
+    async def test_bad_url_is_reported(self):
+        summary, lines = await self.run_batch(["http://[bad", f"{self.base}/ok"], retries=0)
+        results = {line["url"]: line for line in lines[:-1]}
+        self.assertIsNotNone(results["http://[bad"]["error"])
+        self.assertEqual(results[f"{self.base}/ok"]["status"], 200)
+        self.assertEqual((summary["ok"], summary["errors"]), (1, 1))
+
+    async def test_invalid_limits(self):
+        for kwargs in ({"concurrency": 0}, {"per_host": 0}, {"retries": -1}, {"timeout": 0}):
+            with self.assertRaises(ValueError):
+                await self.run_batch([f"{self.base}/ok"], **kwargs)
+
+    def test_load_urls(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as file:
+            file.write("# comment\n")
+            file.write("http://example.com/a\n")
+            file.write(json.dumps({"url": "http://example.com/b"}) + "\n")
+            file.write(json.dumps({"request_id": "x", "body": "See https://example.com/c, then stop."}) + "\n")
+            file.write("{not json\n")
+            file.write("http://example.com/d\n")
+        try:
+            self.assertEqual(networking_demo.load_urls(file.name), ["http://example.com/a", "http://example.com/b", "https://example.com/c", "http://example.com/d"])
+        finally:
+            os.remove(file.name)
+
+    def test_percentile(self):
+        self.assertEqual(networking_demo.percentile([1, 2, 3, 4, 5], 50), 3)
+        self.assertEqual(networking_demo.percentile([1, 2, 3, 4, 5], 90), 5)
+        self.assertEqual(networking_demo.percentile(list(range(1, 101)), 99), 99)
+        self.assertIsNone(networking_demo.percentile([], 50))
+
+class TestSocketBenchmark(unittest.TestCase):
+
+    def setUp(self):
+        self.server = networking_demo.BenchServer().start()
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_tcp_throughput(self):
+        report = networking_demo.tcp_benchmark(self.server.host, self.server.port, payload_size=16384, streams=2, duration=0.2, sndbuf=262144)
+        self.assertEqual(report["streams"], 2)
+        self.assertGreater(report["bytes"], 0)
+        self.assertGreater(report["gbit_per_s"], 0)
+
+    def test_tcp_latency(self):
+        report = networking_demo.tcp_benchmark(self.server.host, self.server.port, payload_size=64, duration=0.2, mode='latency', nodelay=True)
+        self.assertEqual(report["bytes"] % 64, 0)
+        self.assertLessEqual(report["rtt_ms"]["p50"], report["rtt_ms"]["p99"])
+
+    def test_udp_loss_and_jitter(self):
+        report = networking_demo.udp_benchmark(self.server.host, self.server.port, payload_size=512, duration=0.2, rate_mbps=10, linger=0.2)
+        self.assertGreater(report["packets_sent"], 0)
+        self.assertLessEqual(report["packets_received"], report["packets_sent"])
+        self.assertGreaterEqual(report["loss_pct"], 0)
+        self.assertGreaterEqual(report["jitter_ms"], 0)
+        self.assertIsNotNone(report["rtt_ms"]["p50"])
+
+    def test_tcp_latency_payload_larger_than_buffers(self):
+        report = networking_demo.tcp_benchmark(self.server.host, self.server.port, payload_size=1 << 20, duration=0.2,
+                                               mode='latency', sndbuf=65536, rcvbuf=65536)
+        self.assertIsNotNone(report["rtt_ms"]["p50"])
+        self.assertEqual(report["bytes"] % (1 << 20), 0)
+
+    def test_udp_payload_too_large(self):
+        with self.assertRaises(ValueError):
+            networking_demo.udp_benchmark(self.server.host, self.server.port, payload_size=70000, duration=0.1)
+
+    def test_stream_errors_are_raised(self):
+        def fail():
+            raise ValueError("stream failed")
+        with self.assertRaises(ValueError):
+            networking_demo.run_streams(fail, 2)
+
+    def test_invalid_arguments(self):
+        host, port = self.server.host, self.server.port
+        for kwargs in ({"streams": 0}, {"duration": 0}, {"payload_size": 0}):
+            with self.assertRaises(ValueError):
+                networking_demo.tcp_benchmark(host, port, **kwargs)
+        with self.assertRaises(ValueError):
+            networking_demo.udp_benchmark(host, port, rate_mbps=-1, duration=0.1)
+
+if __name__ == '__main__':
+    unittest.main()